@@ -1,7 +1,8 @@
-from parser import Parser, Expr, BinOp, Identifier, UnaryOp, BoolLiteral, Assignment
+from parser import Parser, Expr, BinOp, Identifier, UnaryOp, BoolLiteral, Assignment, Simplify, topological_order
 from tokenizer import Tokenizer
 from typing import Optional
 from itertools import product
+import numpy as np
 
 
 
@@ -136,6 +137,76 @@ def evaluate(parser, show_vars: list[str], combined: list[dict[str, bool]]) -> d
         results_map[assignment_key] = binary_evaluations
     return results_map
 
+def evaluate_columns(order: list[Expr], columns: dict[str, np.ndarray], width: int) -> dict[int, np.ndarray]:
+    """
+    Evaluate every node of a topological order for a whole chunk at once,
+    one bit-packed uint8 column per node, keyed by id(node).
+    """
+    values = {}
+    for node in order:
+        match node:
+            case Identifier(name):
+                result = columns[name]
+            case BoolLiteral(value):
+                result = np.full(width, 0xFF if value else 0, dtype=np.uint8)
+            case UnaryOp("not", operand):
+                result = ~values[id(operand)]
+            case BinOp("and", left, right):
+                result = values[id(left)] & values[id(right)]
+            case BinOp("or", left, right):
+                result = values[id(left)] | values[id(right)]
+            case _:
+                raise ValueError(f"Unknown node type: {type(node)}")
+        values[id(node)] = result
+    return values
+
+def assignments_matrix(parser: Parser, assignments) -> np.ndarray:
+    """
+    Pack dicts, tuples or an (N, n) array of assignments into an (N, n) bool matrix
+    whose columns follow the order of parser.declared.
+    """
+    n = len(parser.declared)
+    if isinstance(assignments, np.ndarray):
+        matrix = assignments.astype(bool, copy=False)
+    else:
+        assignments = list(assignments)
+        if assignments and isinstance(assignments[0], dict):
+            assignments = [tuple(assignment[var] for var in parser.declared) for assignment in assignments]
+        matrix = np.array(assignments, dtype=bool) if assignments else np.zeros((0, n), dtype=bool)
+    if matrix.ndim != 2 or matrix.shape[1] != n:
+        raise RuntimeError(f"Expected assignments of shape (N, {n}), got {matrix.shape}")
+    return matrix
+
+def evaluate_many(parser: Parser, show_vars: list[str], assignments,
+                  chunk_size: int = 65536, packed: bool = True) -> np.ndarray:
+    """
+    Evaluate the show variables for a batch of assignments. The DAG is ordered once,
+    then each chunk of rows is bit-packed 8 rows per byte and evaluated with one loop
+    over that order, so peak memory is about (number of DAG nodes) * chunk_size / 8 bytes.
+    Returns the output bits of assignment i in row i, packed with np.packbits(axis=1)
+    into an (N, ceil(m / 8)) uint8 matrix, or an unpacked (N, m) one if packed is False.
+    """
+    show_exprs = []
+    for show_var in show_vars:
+        show_expr = parser.identifier_map.get(show_var)
+        if show_expr is None:
+            raise RuntimeError(f"Show variable {show_var} is not found")
+        show_exprs.append(show_expr)
+    order = topological_order(show_exprs)
+    matrix = assignments_matrix(parser, assignments)
+    m = len(show_vars)
+    results = np.empty((matrix.shape[0], (m + 7) // 8 if packed else m), dtype=np.uint8)
+    for start in range(0, matrix.shape[0], chunk_size):
+        chunk = matrix[start: start + chunk_size]
+        packed_chunk = np.packbits(chunk, axis=0)
+        columns = {var: packed_chunk[:, i] for i, var in enumerate(parser.declared)}
+        values = evaluate_columns(order, columns, packed_chunk.shape[0])
+        bits = np.empty((len(chunk), m), dtype=np.uint8)
+        for j, show_expr in enumerate(show_exprs):
+            bits[:, j] = np.unpackbits(values[id(show_expr)], count=len(chunk))
+        results[start: start + len(chunk)] = np.packbits(bits, axis=1) if packed else bits
+    return results
+
 def format(parser: Parser, show_vars: list[str], results_map: dict[tuple, list[int]]) -> str:
     formatted = []
     n = len(parser.declared)
@@ -186,6 +257,7 @@ def process_show(parser: Parser, show_vars: list[str], show_ones_map: dict[str,
 if __name__ == "__main__":
     import os
     import time 
+    from simplifier import process_simplify
     # code = """
     # # We declare two variables: x and y
     # var x y;
@@ -213,6 +285,9 @@ if __name__ == "__main__":
         for show_node in parser.shows:
             show_vars = show_node.vars
             # print(show_vars)
+            if isinstance(show_node, Simplify):
+                print(process_simplify(parser, show_vars))
+                continue
             results = process_show_ones(parser, show_vars)
             if show_node.show_ones:
                 print(results)
@@ -49,6 +49,36 @@ class Show(TreeNode):
     vars: list[str]
     show_ones: bool = False
 
+@dataclass
+class Simplify(TreeNode):
+    vars: list[str]
+
+
+def topological_order(roots: list[Expr]) -> list[Expr]:
+    """
+    List the distinct nodes reachable from roots, every node after its operands.
+    Iterative, so long chains of assignments don't hit the recursion limit.
+    """
+    order = []
+    seen = set()
+    stack = [(root, False) for root in reversed(roots)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        stack.append((node, True))
+        match node:
+            case UnaryOp(_, operand):
+                stack.append((operand, False))
+            case BinOp(_, left, right):
+                stack.append((right, False))
+                stack.append((left, False))
+    return order
+
 
 def print_ast(tree: Expr, depth: int = 0) -> None:
     indent = "    " * depth
@@ -75,6 +105,8 @@ def print_ast(tree: Expr, depth: int = 0) -> None:
             print_ast(expr, depth + 1)
         case Show(vars, show_ones):
             print(indent + ("show ones " if show_ones else "show ") + ", ".join(vars))
+        case Simplify(vars):
+            print(indent + "simplify " + ", ".join(vars))
         case _:
             raise RuntimeError(f"Can't print a node of type {tree.__class__.__name__}")
 
@@ -86,7 +118,7 @@ class Parser:
         self.declared: list[str] = []
         self.assigned: list[str] = []
         self.identifier_map: dict[str, Expr] = {}
-        self.shows: list[Show] = []
+        self.shows: list[Show | Simplify] = []
 
     def eat(self, expected_token_type: TokenType) -> Token:
         next_token = self.tokens[self.next_token_index]
@@ -112,6 +144,8 @@ class Parser:
             elif self.peek() == TokenType.SHOW or self.peek() == TokenType.SHOW_ONES:
                 statements.append(self.parse_show())
                 # print(statements)
+            elif self.peek() == TokenType.SIMPLIFY:
+                statements.append(self.parse_simplify())
             elif self.peek() == TokenType.IDENTIFIER:
                 statements.append(self.parse_assignement())
                 # print(statements)
@@ -168,6 +202,19 @@ class Parser:
         self.shows.append(out)
         return out
 
+    def parse_simplify(self) -> Simplify:
+        """
+        <simplify> ::= "simplify" <identifier> {<identifier>} ";"
+        """
+        self.eat(TokenType.SIMPLIFY)
+        vars = []
+        while self.peek() == TokenType.IDENTIFIER:
+            vars.append(self.eat(TokenType.IDENTIFIER).value)
+        self.eat(TokenType.SEMICOLON)
+        out = Simplify(vars)
+        self.shows.append(out)
+        return out
+
     
     def element(self) -> Expr:
         """
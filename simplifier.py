@@ -0,0 +1,446 @@
+from parser import Parser, Expr, BinOp, Identifier, UnaryOp, BoolLiteral, topological_order
+from tokenizer import Tokenizer
+from collections import Counter, deque
+from typing import Any, Generator
+
+FALSE = 0
+TRUE = 1
+# Covers with more cubes than this are abandoned, e.g. parity has 2^(n-1) cubes
+MAX_CUBES = 1024
+# BDDs with more live nodes than this are abandoned, e.g. multipliers are exponential in any order
+MAX_BDD_NODES = 20000
+# BDD operations taking more steps than this are abandoned, cache hits included
+MAX_BDD_STEPS = 500000
+
+
+class CoverTooLarge(RuntimeError):
+    pass
+
+
+class BDDTooLarge(RuntimeError):
+    pass
+
+
+class TooManySteps(RuntimeError):
+    pass
+
+
+class BDD:
+    """
+    Reduced ordered binary decision diagram over the given variables, in that order.
+    Nodes are integers: 0 and 1 are the terminals, every other node is a
+    (level, low, high) triple stored in self.nodes and shared via self.unique.
+    Raises BDDTooLarge once more than MAX_BDD_NODES nodes are stored; collect() drops
+    the nodes no longer needed, so the limit bounds the live BDDs plus one operation.
+    Raises TooManySteps once the operations together take more than MAX_BDD_STEPS steps.
+    """
+    def __init__(self, variables: list[str]) -> None:
+        self.variables = variables
+        self.levels = {var: level for level, var in enumerate(variables)}
+        self.nodes: list[tuple[int, int, int]] = [(len(variables), FALSE, FALSE),
+                                                  (len(variables), TRUE, TRUE)]
+        self.unique: dict[tuple[int, int, int], int] = {}
+        self.and_cache: dict[tuple[int, int], int] = {}
+        self.or_cache: dict[tuple[int, int], int] = {}
+        self.not_cache: dict[int, int] = {}
+        self.steps = 0
+
+    def run(self, call: Generator) -> Any:
+        """
+        Run a recursive generator on an explicit stack, so recursion depth is not limited
+        by Python's. Each generator yields the sub-call it needs and receives its result.
+        Every call, the first one included, is a step counted against MAX_BDD_STEPS.
+        """
+        self.steps += 1
+        stack = [call]
+        value = None
+        while stack:
+            try:
+                sub_call = stack[-1].send(value)
+            except StopIteration as stop:
+                stack.pop()
+                value = stop.value
+            else:
+                self.steps += 1
+                if self.steps > MAX_BDD_STEPS:
+                    raise TooManySteps(f"BDD operations need more than {MAX_BDD_STEPS} steps")
+                stack.append(sub_call)
+                value = None
+        return value
+
+    def level(self, u: int) -> int:
+        return self.nodes[u][0]
+
+    def make(self, level: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (level, low, high)
+        if key not in self.unique:
+            if len(self.nodes) >= MAX_BDD_NODES:
+                raise BDDTooLarge(f"BDD needs more than {MAX_BDD_NODES} nodes")
+            self.unique[key] = len(self.nodes)
+            self.nodes.append(key)
+        return self.unique[key]
+
+    def collect(self, roots: list[int]) -> list[int]:
+        """
+        Drop every node unreachable from roots and clear the caches.
+        Returns the roots renumbered. Children always have smaller numbers than
+        their parents, so renumbering in increasing order keeps that true.
+        """
+        reachable = set()
+        stack = [root for root in roots if root > TRUE]
+        while stack:
+            u = stack.pop()
+            if u in reachable:
+                continue
+            reachable.add(u)
+            _, low, high = self.nodes[u]
+            stack.extend(child for child in (low, high) if child > TRUE)
+        renumbered = {FALSE: FALSE, TRUE: TRUE}
+        old_nodes, self.nodes, self.unique = self.nodes, self.nodes[:2], {}
+        for u in sorted(reachable):
+            level, low, high = old_nodes[u]
+            key = (level, renumbered[low], renumbered[high])
+            renumbered[u] = self.unique[key] = len(self.nodes)
+            self.nodes.append(key)
+        self.and_cache.clear()
+        self.or_cache.clear()
+        self.not_cache.clear()
+        return [renumbered[root] for root in roots]
+
+    def var(self, name: str) -> int:
+        return self.make(self.levels[name], FALSE, TRUE)
+
+    def cofactors(self, u: int, level: int) -> tuple[int, int]:
+        u_level, low, high = self.nodes[u]
+        if u_level == level:
+            return low, high
+        return u, u
+
+    def negate(self, u: int) -> int:
+        return self.run(self._negate(u))
+
+    def conjoin(self, u: int, v: int) -> int:
+        return self.run(self._conjoin(u, v))
+
+    def disjoin(self, u: int, v: int) -> int:
+        return self.run(self._disjoin(u, v))
+
+    def _negate(self, u: int) -> Generator:
+        if u <= TRUE:
+            return 1 - u
+        if u not in self.not_cache:
+            level, low, high = self.nodes[u]
+            self.not_cache[u] = self.make(level, (yield self._negate(low)), (yield self._negate(high)))
+        return self.not_cache[u]
+
+    def _conjoin(self, u: int, v: int) -> Generator:
+        if u == FALSE or v == FALSE:
+            return FALSE
+        if u == TRUE or u == v:
+            return v
+        if v == TRUE:
+            return u
+        key = (u, v) if u < v else (v, u)
+        if key not in self.and_cache:
+            level = min(self.level(u), self.level(v))
+            u0, u1 = self.cofactors(u, level)
+            v0, v1 = self.cofactors(v, level)
+            self.and_cache[key] = self.make(level, (yield self._conjoin(u0, v0)), (yield self._conjoin(u1, v1)))
+        return self.and_cache[key]
+
+    def _disjoin(self, u: int, v: int) -> Generator:
+        if u == TRUE or v == TRUE:
+            return TRUE
+        if u == FALSE or u == v:
+            return v
+        if v == FALSE:
+            return u
+        key = (u, v) if u < v else (v, u)
+        if key not in self.or_cache:
+            level = min(self.level(u), self.level(v))
+            u0, u1 = self.cofactors(u, level)
+            v0, v1 = self.cofactors(v, level)
+            self.or_cache[key] = self.make(level, (yield self._disjoin(u0, v0)), (yield self._disjoin(u1, v1)))
+        return self.or_cache[key]
+
+    def build(self, node: Expr) -> int:
+        """
+        Build the BDD of an expression. Shared subexpressions of the DAG are built once,
+        and each is dropped after its last use, so collect() only keeps what is still needed.
+        Collection runs once the store is half full, then whenever it has doubled since.
+        """
+        order = topological_order([node])
+        last_use = {}
+        for index, child in enumerate(order):
+            match child:
+                case UnaryOp(_, operand):
+                    last_use[id(operand)] = index
+                case BinOp(_, left, right):
+                    last_use[id(left)] = last_use[id(right)] = index
+        built = {}
+        threshold = MAX_BDD_NODES // 2
+        for index, child in enumerate(order):
+            if len(self.nodes) > threshold:
+                ids = list(built)
+                built = dict(zip(ids, self.collect([built[key] for key in ids])))
+                # Wait for the store to double again, so live nodes are not re-collected every step
+                threshold = max(MAX_BDD_NODES // 2, 2 * len(self.nodes))
+            match child:
+                case Identifier(name):
+                    result = self.var(name)
+                case BoolLiteral(value):
+                    result = TRUE if value else FALSE
+                case UnaryOp("not", operand):
+                    result = self.negate(built[id(operand)])
+                case BinOp("and", left, right):
+                    result = self.conjoin(built[id(left)], built[id(right)])
+                case BinOp("or", left, right):
+                    result = self.disjoin(built[id(left)], built[id(right)])
+                case _:
+                    raise ValueError(f"Unknown node type: {type(child)}")
+            match child:
+                case UnaryOp(_, operand) if last_use[id(operand)] == index:
+                    del built[id(operand)]
+                case BinOp(_, left, right):
+                    for operand in (left, right):
+                        if last_use[id(operand)] == index:
+                            built.pop(id(operand), None)
+            built[id(child)] = result
+        return built[id(node)]
+
+    def isop(self, lower: int, upper: int) -> tuple[list[tuple[tuple[int, bool], ...]], int]:
+        """
+        Minato-Morreale irredundant sum-of-products of any function between lower and upper.
+        Returns the cubes, each a tuple of (level, value) literals, and the BDD of the cover.
+        Raises CoverTooLarge as soon as a partial cover exceeds MAX_CUBES.
+        """
+        return self.run(self._isop(lower, upper, {}))
+
+    def _isop(self, lower: int, upper: int, cache: dict[tuple[int, int], tuple[list, int]]) -> Generator:
+        if lower == FALSE:
+            return [], FALSE
+        if upper == TRUE:
+            return [()], TRUE
+        key = (lower, upper)
+        if key in cache:
+            return cache[key]
+        level = min(self.level(lower), self.level(upper))
+        lower0, lower1 = self.cofactors(lower, level)
+        upper0, upper1 = self.cofactors(upper, level)
+
+        # Cubes that must contain the negative / positive literal of the top variable
+        only0 = yield self._conjoin(lower0, (yield self._negate(upper1)))
+        cubes0, cover0 = yield self._isop(only0, upper0, cache)
+        only1 = yield self._conjoin(lower1, (yield self._negate(upper0)))
+        cubes1, cover1 = yield self._isop(only1, upper1, cache)
+        # Whatever is left is covered by cubes independent of the top variable
+        rest0 = yield self._conjoin(lower0, (yield self._negate(cover0)))
+        rest1 = yield self._conjoin(lower1, (yield self._negate(cover1)))
+        rest_lower = yield self._disjoin(rest0, rest1)
+        rest_upper = yield self._conjoin(upper0, upper1)
+        cubes_rest, cover_rest = yield self._isop(rest_lower, rest_upper, cache)
+
+        cubes = ([((level, False),) + cube for cube in cubes0]
+                 + [((level, True),) + cube for cube in cubes1]
+                 + cubes_rest)
+        if len(cubes) > MAX_CUBES:
+            raise CoverTooLarge(f"Cover needs more than {MAX_CUBES} cubes")
+        cover = self.make(level, (yield self._disjoin(cover0, cover_rest)), (yield self._disjoin(cover1, cover_rest)))
+        cache[key] = (cubes, cover)
+        return cubes, cover
+
+
+def chain(op: str, operands: list[Expr]) -> Expr:
+    node = operands[0]
+    for operand in operands[1:]:
+        node = BinOp(op, node, operand)
+    return node
+
+def factor(cubes: list[tuple[tuple[int, bool], ...]], literals: dict[tuple[int, bool], Expr]) -> Expr:
+    """
+    Factor a cover by repeatedly pulling out the literal shared by the most cubes,
+    e.g. (x and y) or (x and z) becomes x and (y or z).
+    """
+    if not cubes:
+        return BoolLiteral(False)
+    if any(not cube for cube in cubes):
+        return BoolLiteral(True)
+    terms = []
+    while cubes:
+        counts = Counter(literal for cube in cubes for literal in cube)
+        literal, count = counts.most_common(1)[0]
+        if count == 1:
+            terms.extend(chain("and", [literals[literal] for literal in sorted(cube)]) for cube in cubes)
+            break
+        quotient = factor([tuple(other for other in cube if other != literal) for cube in cubes if literal in cube],
+                          literals)
+        terms.append(literals[literal] if isinstance(quotient, BoolLiteral)
+                     else BinOp("and", literals[literal], quotient))
+        cubes = [cube for cube in cubes if literal not in cube]
+    return chain("or", terms)
+
+def format_expr(node: Expr, names: dict[int, str]) -> str:
+    """
+    Write an expression back in the input language, e.g. (x and (not y)) or z.
+    Subexpressions below the root found in names are written as the variable they were assigned to.
+    """
+    def operand(child: Expr) -> str:
+        if id(child) in names:
+            return names[id(child)]
+        if isinstance(child, Identifier | BoolLiteral):
+            return format_expr(child, names)
+        return f"({format_expr(child, names)})"
+
+    def flatten(op: str, node: BinOp) -> list[Expr]:
+        operands = []
+        stack = [node.right, node.left]
+        while stack:
+            child = stack.pop()
+            if isinstance(child, BinOp) and child.op == op and id(child) not in names:
+                stack.extend([child.right, child.left])
+            else:
+                operands.append(child)
+        return operands
+
+    match node:
+        case Identifier(name):
+            return name
+        case BoolLiteral(value):
+            return str(value)
+        case UnaryOp("not", child):
+            return f"not {operand(child)}"
+        case BinOp(op, _, _):
+            return f" {op} ".join(operand(child) for child in flatten(op, node))
+        case _:
+            raise ValueError(f"Unknown node type: {type(node)}")
+
+def referenced_names(node: Expr, names: dict[int, str]) -> set[str]:
+    """
+    Collect the variables that format_expr(node, names) writes by name instead of expanding.
+    """
+    found = set()
+    stack = [node]
+    while stack:
+        child = stack.pop()
+        if child is not node and id(child) in names:
+            found.add(names[id(child)])
+            continue
+        match child:
+            case UnaryOp(_, operand):
+                stack.append(operand)
+            case BinOp(_, left, right):
+                stack.extend([left, right])
+    return found
+
+def variable_order(node: Expr) -> list[str]:
+    """
+    Order the variables of an expression breadth-first from its root, so the variables
+    closest to the output come first. In a chain of assignments such as a_k = a_(k-1) and x_k
+    the last variable added is then at the top of the BDD, whichever side the chain nests on,
+    and conjoining it leaves the BDD below untouched.
+    """
+    order = []
+    seen = {id(node)}
+    queue = deque([node])
+    while queue:
+        child = queue.popleft()
+        match child:
+            case Identifier(name):
+                order.append(name)
+                operands = []
+            case UnaryOp(_, operand):
+                operands = [operand]
+            case BinOp(_, left, right):
+                operands = [left, right]
+            case _:
+                operands = []
+        for operand in operands:
+            if id(operand) not in seen:
+                seen.add(id(operand))
+                queue.append(operand)
+    return order
+
+def simplify_expr(node: Expr) -> Expr | None:
+    """
+    Factored irredundant sum-of-products of an expression, or None when the BDD or the
+    cover is too large, BDD operations take too many steps, factoring runs out of
+    recursion depth, or the result has more nodes than the original DAG.
+    The BDD uses variable_order, while cubes are written with their literals in order
+    of first appearance in the expression.
+    """
+    variables = [child.name for child in topological_order([node]) if isinstance(child, Identifier)]
+    position = {var: index for index, var in enumerate(variables)}
+    bdd = BDD(variable_order(node))
+    literals = {}
+    for index, var in enumerate(variables):
+        identifier = Identifier(var)
+        literals[(index, True)] = identifier
+        literals[(index, False)] = UnaryOp("not", identifier)
+    try:
+        f, = bdd.collect([bdd.build(node)])
+        cubes, _ = bdd.isop(f, f)
+        cubes = [tuple((position[bdd.variables[level]], value) for level, value in cube) for cube in cubes]
+        simplified = factor(cubes, literals)
+    except (BDDTooLarge, TooManySteps, CoverTooLarge, RecursionError):
+        return None
+    if len(topological_order([simplified])) > len(topological_order([node])):
+        return None
+    return simplified
+
+def process_simplify(parser: Parser, show_vars: list[str]) -> str:
+    """
+    Print each show variable as a factored irredundant sum-of-products. When simplify_expr
+    gives up, the expression is printed as written, with earlier assigned variables kept by
+    name, and the assignments it depends on are printed too, so the output stands alone.
+    Lines come in program order, each variable once. Declared variables have no
+    assignment to print, so they are rejected like unknown ones.
+    """
+    names = {}
+    for name, expr in parser.identifier_map.items():
+        names.setdefault(id(expr), name)
+    assigned = set(parser.assigned)
+    lines = {}
+    pending = []
+    for show_var in show_vars:
+        show_expr = parser.identifier_map.get(show_var)
+        if show_expr is None:
+            raise RuntimeError(f"Show variable {show_var} is not found")
+        if show_var not in assigned:
+            raise RuntimeError(f"Show variable {show_var} is declared, not assigned")
+        if show_var in lines:
+            continue
+        simplified = simplify_expr(show_expr)
+        if simplified is not None:
+            try:
+                lines[show_var] = format_expr(simplified, {})
+            except RecursionError:
+                simplified = None
+        if simplified is None:
+            lines[show_var] = format_expr(show_expr, names)
+            pending.extend(referenced_names(show_expr, names))
+    while pending:
+        name = pending.pop()
+        if name in lines or name not in assigned:
+            continue
+        expr = parser.identifier_map[name]
+        lines[name] = format_expr(expr, names)
+        pending.extend(referenced_names(expr, names))
+    program_order = {name: index for index, name in enumerate(parser.identifier_map)}
+    return "\n".join(f"{name} = {lines[name]};" for name in sorted(lines, key=program_order.get))
+
+if __name__ == "__main__":
+    code = """
+    # We declare three variables: x, y and w
+    var x y w;
+    # We assign (x or y) and (not (x and y)) to z
+    z = (x or y) and (not (x and y));
+    t = (x and y) or (x and (not y)) or (w and x);
+    # We print a factored sum-of-products form of z and t
+    simplify z t;
+    """
+    parser = Parser(list(Tokenizer(code)))
+    parser.parse()
+    for show_node in parser.shows:
+        print(process_simplify(parser, show_node.vars))
@@ -1,8 +1,9 @@
-from parser import Parser, Expr, BinOp, Identifier, UnaryOp, BoolLiteral, Assignment
+from parser import Parser, Expr, BinOp, Identifier, UnaryOp, BoolLiteral, Assignment, Simplify
 from tokenizer import Tokenizer
 from typing import Optional
 from itertools import product
 from compiler import *
+from simplifier import process_simplify
 
 import sys
 
@@ -24,6 +25,9 @@ def main():
             for show_node in parser.shows:
                 show_vars = show_node.vars
                 # print(show_vars)
+                if isinstance(show_node, Simplify):
+                    print(process_simplify(parser, show_vars))
+                    continue
                 results = process_show_ones(parser, show_vars)
                 if show_node.show_ones:
                     print(results)
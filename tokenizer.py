@@ -18,6 +18,7 @@ class TokenType(StrEnum):
     EOF = auto()
     SHOW = auto()
     SHOW_ONES = auto()
+    SIMPLIFY = auto()
     VAR = auto()
     ASSIGN = auto()
     SEMICOLON = auto()
@@ -88,6 +89,8 @@ class Tokenizer:
                 return Token(TokenType.SHOW)
             elif word == "show_ones":
                 return Token(TokenType.SHOW_ONES)
+            elif word == "simplify":
+                return Token(TokenType.SIMPLIFY)
             else:
                 return Token(TokenType.IDENTIFIER, word)
         else: